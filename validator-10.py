@@ -1,5 +1,6 @@
 # validator-10.py
 import sys
+import math
 import numpy as np
 import pandas as pd
 import pyqtgraph as pg
@@ -8,15 +9,39 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QWidget,
                             QCheckBox, QSlider, QSpinBox, QGridLayout, QGroupBox,
                             QDoubleSpinBox, QFileDialog, QMessageBox, QRadioButton,
                             QButtonGroup, QSplitter)
-from PyQt5.QtCore import QTimer, Qt, pyqtSignal
+from PyQt5.QtCore import QTimer, Qt, pyqtSignal, pyqtSlot, QObject, QThread
 from PyQt5.QtGui import QFont
 import os
-import struct
 from scipy import signal as scipy_signal
-from scipy.interpolate import interp1d
-from scipy.fft import fft, fftfreq
+from scipy.fft import rfft, irfft, next_fast_len
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Antialiasing off keeps wide pens cheap. GPU line drawing is opt-in (ECG_VALIDATOR_OPENGL=1),
+# since without a working GL context (RDP sessions, VMs) plots can come up blank
+USE_OPENGL = os.environ.get('ECG_VALIDATOR_OPENGL', '0') == '1'
+pg.setConfigOptions(useOpenGL=USE_OPENGL, antialias=False, enableExperimental=USE_OPENGL)
+
+class MetricsWorker(QObject):
+    """Runs the metric pipeline on its own thread and posts results back"""
+    resultsReady = pyqtSignal(object, object)
+    
+    def __init__(self, compute_metrics):
+        super().__init__()
+        self.compute_metrics = compute_metrics
+    
+    @pyqtSlot(object, object, int, object, object)
+    def compute(self, ref, measured, fs, thd_request, context):
+        """Compute (snr, mse, peak, thd, corr, lag); failures are posted as the exception"""
+        try:
+            results = self.compute_metrics(ref, measured, fs, thd_request)
+        except Exception as e:
+            results = e
+        self.resultsReady.emit(results, context)
 
 class ECGSignalValidator10(QMainWindow):
+    # (ref overlap, resampled measured, fs, THD request, display context) for the metrics worker
+    metrics_requested = pyqtSignal(object, object, int, object, object)
+    
     def __init__(self):
         super().__init__()
         
@@ -26,6 +51,7 @@ class ECGSignalValidator10(QMainWindow):
         self.offset_voltage = 1.65
         self.offset_adc = 2048
         self.gain = 1000  # Default gain
+        self.update_adc_conversion()
         
         # Sample rates
         self.reference_sample_rate = 360  # From PhysioNet
@@ -38,10 +64,16 @@ class ECGSignalValidator10(QMainWindow):
         self.current_channel = 0
         
         # Data storage
-        self.reference_data = None  # 10-channel reference from binary
-        self.measured_data = {}     # Dictionary of measured signals by channel
+        self._reference_adc = None  # (10, samples) uint16 ADC counts of the active channels, one row each
+        self._mv_cache = {}  # Channel -> reference signal in mV, converted on first use
+        self._last_yrange = {}  # Plot widget -> last quantized (min, max) passed to setYRange
+        self._ref_minmax_cache = {}  # Channel -> (mV array, per-block min, per-block max) for Y auto-range
+        self.minmax_block = 256  # Samples per block in the reference min/max table
+        self.measured_matrix = None  # (10, N) float32 measured signals, rows zero-padded to the longest
         self.time_reference = None
-        self.time_measured = {}
+        self.measured_time = None    # Time axis shared by all measured channels
+        self._meas_len = np.zeros(10, dtype=int)  # Valid samples per measured channel
+        self._mock_channels = np.zeros(10, dtype=bool)  # True where no CSV was found (zero row)
         
         # Display mode
         self.display_mode = "side_by_side"  # or "overlay"
@@ -50,6 +82,39 @@ class ECGSignalValidator10(QMainWindow):
         self.window_size = 2000
         self.current_index = 0
         self.time_offset = 0.0
+        self._window_cache = {}  # Hanning windows for THD keyed by length
+        self._thd_cache = {}  # (load generation, channel, start, length) -> THD (GUI thread only)
+        self._work_buffers = {}  # Named scratch arrays reused by the metric kernels (worker thread only)
+        self._load_generation = 0  # Bumped on every reload so stale THD entries never match
+        self._interp_cache = {'key': None, 'x_target': None, 'xp': None}  # Metric resampling grids
+        self._ref_spectrum_cache = {'ref': None, 'n_fft': None, 'spectrum': None}  # Auto-align reference FFT
+        self._measured_norm_buf = None  # Reused normalization output for auto-align
+        self._align_weights = {}  # Measured length -> (idx, w) resampling onto the reference grid
+        self._measured_adjusted_mv = None  # Current channel with scale/offset applied, in mV
+        self._adjusted_key = None  # (channel, scale, offset, length) the buffer was built for
+        self.max_correlation_lag = 0.1  # Seconds searched either side of zero lag by the overlap metrics
+        self.direct_xcorr_max_lags = 128  # Lag counts up to this use one direct product instead of FFT
+        
+        # Throttle timer - bursts of spinbox/slider events redraw at most once per 16 ms,
+        # so the plots keep following a drag
+        self._redraw_timer = QTimer(self)
+        self._redraw_timer.setSingleShot(True)
+        self._redraw_timer.setInterval(16)
+        self._redraw_timer.timeout.connect(self._do_update_plots)
+        
+        # Metrics are coalesced separately - only the last change in a 40 ms burst is evaluated
+        self._metrics_timer = QTimer(self)
+        self._metrics_timer.setSingleShot(True)
+        self._metrics_timer.setInterval(40)
+        self._metrics_timer.timeout.connect(self.calculate_snr_mse)
+        
+        # Metrics worker thread - FFT/correlation never block repaints
+        self.metrics_thread = QThread(self)
+        self.metrics_worker = MetricsWorker(self.compute_metrics)
+        self.metrics_worker.moveToThread(self.metrics_thread)
+        self.metrics_requested.connect(self.metrics_worker.compute, Qt.QueuedConnection)
+        self.metrics_worker.resultsReady.connect(self.show_metrics, Qt.QueuedConnection)
+        self.metrics_thread.start()
         
         # Signal folder
         self.signal_folder = "signal10"
@@ -180,7 +245,7 @@ class ECGSignalValidator10(QMainWindow):
         self.scale_spinbox.setDecimals(2)
         self.scale_spinbox.setSingleStep(0.1)
         self.scale_spinbox.setValue(1.0)
-        self.scale_spinbox.valueChanged.connect(self.update_plots)
+        self.scale_spinbox.valueChanged.connect(self._schedule_update)
         self.control_layout.addWidget(self.scale_spinbox, 3, 3)
         
         # Signal offset for measured signal
@@ -193,7 +258,7 @@ class ECGSignalValidator10(QMainWindow):
         self.signal_offset_spinbox.setDecimals(3)
         self.signal_offset_spinbox.setSingleStep(0.01)
         self.signal_offset_spinbox.setValue(0.0)
-        self.signal_offset_spinbox.valueChanged.connect(self.update_plots)
+        self.signal_offset_spinbox.valueChanged.connect(self._schedule_update)
         self.control_layout.addWidget(self.signal_offset_spinbox, 3, 5)
         
         # Row 4: Window and navigation
@@ -212,6 +277,14 @@ class ECGSignalValidator10(QMainWindow):
         self.auto_align_button.clicked.connect(self.auto_align_signals)
         self.control_layout.addWidget(self.auto_align_button, 4, 2)
         
+        self.align_all_button = QPushButton("Align All Leads")
+        self.align_all_button.clicked.connect(self.auto_align_all_leads)
+        self.control_layout.addWidget(self.align_all_button, 4, 4)
+        
+        self.all_metrics_button = QPushButton("All Leads Metrics")
+        self.all_metrics_button.clicked.connect(self.print_all_metrics)
+        self.control_layout.addWidget(self.all_metrics_button, 4, 3)
+        
         # Row 5: Navigation
         self.nav_label = QLabel("Navigation:")
         self.nav_label.setStyleSheet("font-weight: bold;")
@@ -279,16 +352,21 @@ class ECGSignalValidator10(QMainWindow):
         self.ref_plot_widget.setLabel('left', 'Voltage (mV)')
         self.ref_plot_widget.setLabel('bottom', 'Time (s)')
         
-        self.ref_plot_line = self.ref_plot_widget.plot(pen=pg.mkPen(color='b', width=2))
+        # Draw at most ~one peak pair per pixel column, and only what is in view
+        self.ref_plot_line = self.ref_plot_widget.plot(pen=pg.mkPen(color='b', width=2),
+                                                       autoDownsample=True, downsampleMethod='peak',
+                                                       clipToView=True)
         
         # Measured plot (right)
         self.measured_plot_widget = pg.PlotWidget(title="Measured Signal (from Oscilloscope)")
         self.measured_plot_widget.setBackground('w')
         self.measured_plot_widget.showGrid(x=True, y=True, alpha=0.3)
-        self.measured_plot_widget.setLabel('left', 'Voltage (V)')
+        self.measured_plot_widget.setLabel('left', 'Voltage (mV)')
         self.measured_plot_widget.setLabel('bottom', 'Time (s)')
         
-        self.measured_plot_line = self.measured_plot_widget.plot(pen=pg.mkPen(color='r', width=2))
+        self.measured_plot_line = self.measured_plot_widget.plot(pen=pg.mkPen(color='r', width=2),
+                                                                 autoDownsample=True, downsampleMethod='peak',
+                                                                 clipToView=True)
         
         # Link X axes
         self.measured_plot_widget.setXLink(self.ref_plot_widget)
@@ -310,14 +388,16 @@ class ECGSignalValidator10(QMainWindow):
         self.overlay_plot.setLabel('left', 'Voltage')
         self.overlay_plot.setLabel('bottom', 'Time (s)')
         
-        # Create two lines
+        # Create two lines - peak downsampling keeps QRS extremes while drawing ~pixel-count points
         self.overlay_ref_line = self.overlay_plot.plot(
             pen=pg.mkPen(color='b', width=2), 
-            name='Reference'
+            name='Reference',
+            autoDownsample=True, downsampleMethod='peak', clipToView=True
         )
         self.overlay_measured_line = self.overlay_plot.plot(
             pen=pg.mkPen(color='r', width=2), 
-            name='Measured'
+            name='Measured',
+            autoDownsample=True, downsampleMethod='peak', clipToView=True
         )
         
         # Add legend
@@ -327,6 +407,11 @@ class ECGSignalValidator10(QMainWindow):
     
     def load_all_data(self):
         """Load reference binary and all CSV files"""
+        # New time axes (or a new measured sample rate) invalidate the resampling grids
+        self._interp_cache['key'] = None
+        self._adjusted_key = None
+        self._load_generation += 1
+        
         try:
             # Check if signal folder exists
             if not os.path.exists(self.signal_folder):
@@ -345,19 +430,23 @@ class ECGSignalValidator10(QMainWindow):
             self.load_reference_binary(ref_path)
             
             # Debug info
-            if self.reference_data is not None:
+            if self._reference_adc is not None:
                 print("\n10-Lead Reference data loaded:")
                 for i in range(10):
-                    channel_data = self.reference_data[i]
-                    non_zero = channel_data[channel_data != 0]
+                    # Summarize in raw ADC counts; only the two extremes are converted to mV
+                    channel_adc = self._reference_adc[i]
+                    non_zero = channel_adc[channel_adc != 0]
                     if len(non_zero) > 0:
-                        print(f"Channel {self.channel_names[i]}: min={np.min(non_zero):.2f} mV, max={np.max(non_zero):.2f} mV, samples={len(channel_data)}")
+                        mv_min, mv_max = self.adc_to_mv(np.array([non_zero.min(), non_zero.max()]))
+                        print(f"Channel {self.channel_names[i]}: min={mv_min:.2f} mV, max={mv_max:.2f} mV, samples={len(channel_adc)}")
                     else:
                         print(f"Channel {self.channel_names[i]}: Empty (all zeros)")
             
-            # Load all CSV files (RA.csv, LA.csv, LL.csv, RL.csv, V1.csv-V6.csv)
-            self.measured_data = {}
-            self.time_measured = {}
+            # Load all CSV files (RA.csv, LA.csv, LL.csv, RL.csv, V1.csv-V6.csv) into one (10, N) matrix
+            num_samples = int(len(self.time_reference) * self.measured_sample_rate / self.reference_sample_rate)
+            self.measured_matrix = np.zeros((10, num_samples), dtype=np.float32)
+            self._meas_len = np.zeros(10, dtype=int)
+            self._mock_channels = np.zeros(10, dtype=bool)
             
             for i in range(10):
                 csv_filename = f"{self.channel_names[i]}.csv"
@@ -367,15 +456,20 @@ class ECGSignalValidator10(QMainWindow):
                     self.load_measured_csv(csv_path, i)
                     self.status_label.setText(f"Loaded 10-lead channel {self.channel_names[i]}")
                 else:
-                    # Create mock data (zero signal)
-                    num_samples = int(len(self.time_reference) * self.measured_sample_rate / self.reference_sample_rate)
-                    self.time_measured[i] = np.linspace(0, self.time_reference[-1], num_samples)
-                    self.measured_data[i] = np.zeros(num_samples)
+                    # Mock data (zero signal) is the untouched row
+                    self._meas_len[i] = num_samples
+                    self._mock_channels[i] = True
                     print(f"10-lead Channel {self.channel_names[i]}: Using mock data (file not found)")
             
+            # One time axis based on measured sample rate serves every channel
+            self.measured_time = np.arange(self.measured_matrix.shape[1]) / self.measured_sample_rate
+            
+            # Auto-align resampling weights depend only on the grids, so build them once per length
+            self._align_weights = {n: self.build_align_weights(n) for n in set(self._meas_len.tolist()) if n >= 2}
+            
             # Update navigation slider
-            if self.reference_data is not None:
-                max_samples = len(self.reference_data[0])
+            if self._reference_adc is not None:
+                max_samples = len(self.time_reference)
                 self.nav_slider.setMaximum(max(0, max_samples - self.window_size))
             
             self.status_label.setText("All 10-lead data loaded successfully")
@@ -390,35 +484,23 @@ class ECGSignalValidator10(QMainWindow):
             file_size = os.path.getsize(filepath)
             num_samples = file_size // (12 * 2)  # 12 channels, 2 bytes per sample
             
-            # Read binary data
-            with open(filepath, 'rb') as f:
-                raw_data = f.read()
+            # Read the file in one call - format is sequential: Ch1_S1, Ch2_S1, ..., Ch12_S1, Ch1_S2, ...
+            # as unsigned 16-bit little-endian. It is read eagerly and not mapped, so the file can be
+            # replaced before a reload without later reads seeing changed or truncated data
+            raw = np.fromfile(filepath, dtype=np.dtype('<u2'), count=num_samples * 12).reshape(num_samples, 12)
             
-            # Initialize array for 12 channels (including padding)
-            full_data = np.zeros((12, num_samples))
-            
-            # Parse data - file format is sequential: Ch1_S1, Ch2_S1, ..., Ch12_S1, Ch1_S2, ...
-            idx = 0
-            for sample in range(num_samples):
-                for channel in range(12):
-                    # Read 2 bytes as unsigned 16-bit little-endian
-                    value = struct.unpack('<H', raw_data[idx:idx+2])[0]
-                    full_data[channel, sample] = value
-                    idx += 2
-            
-            # Extract only the 10 active channels (skip positions 4 and 5)
+            # Keep only the 10 active channels (positions 4 and 5 are skipped), one contiguous row each
             # Mapping: RA(0), LA(1), LL(2), RL(3), skip(4), skip(5), V1(6), V2(7), V3(8), V4(9), V5(10), V6(11)
-            self.reference_data = np.zeros((10, num_samples))
-            for i, binary_pos in enumerate(self.channel_binary_mapping):
-                self.reference_data[i] = full_data[binary_pos]
+            self._reference_adc = np.empty((10, num_samples), dtype=np.uint16)
+            for i, column in enumerate(self.channel_binary_mapping):
+                self._reference_adc[i] = raw[:, column]
+            del raw
+            self._mv_cache.clear()
+            self._ref_minmax_cache.clear()
             
             # Create time array
             self.time_reference = np.arange(num_samples) / self.reference_sample_rate
             
-            # Convert ADC to mV for display
-            for i in range(10):
-                self.reference_data[i] = self.adc_to_mv(self.reference_data[i])
-            
             print(f"Loaded 10-lead binary file: {num_samples} samples, {10} active channels")
             print(f"Binary structure: RA,LA,LL,RL,0,0,V1,V2,V3,V4,V5,V6 (extracted 10 active)")
             
@@ -428,136 +510,196 @@ class ECGSignalValidator10(QMainWindow):
     def load_measured_csv(self, filepath, channel_idx):
         """Load CSV file from oscilloscope"""
         try:
-            # Read CSV with pandas
-            df = pd.read_csv(filepath)
+            # Read only the voltage column(s) ('Volt' or similar), parsed straight to float32
+            df = pd.read_csv(filepath, usecols=lambda col: 'volt' in col.lower(),
+                             dtype=np.float32, engine='c')
             
-            # Extract voltage data (assuming 'Volt' column)
-            if 'Volt' in df.columns:
-                voltage = df['Volt'].values
-            else:
-                # Try to find voltage column
-                voltage_cols = [col for col in df.columns if 'volt' in col.lower()]
-                if voltage_cols:
-                    voltage = df[voltage_cols[0]].values
-                else:
-                    raise Exception("No voltage column found in CSV")
+            if len(df.columns) == 0:
+                raise Exception("No voltage column found in CSV")
+            
+            # Prefer the exact 'Volt' column when several match
+            voltage_col = 'Volt' if 'Volt' in df.columns else df.columns[0]
+            voltage = df[voltage_col].to_numpy()
             
-            # Create time array based on measured sample rate
+            # Grow all rows to the longest capture (zero padded)
             num_samples = len(voltage)
-            duration = num_samples / self.measured_sample_rate
-            time = np.linspace(0, duration, num_samples)
+            if num_samples > self.measured_matrix.shape[1]:
+                grown = np.zeros((10, num_samples), dtype=np.float32)
+                grown[:, :self.measured_matrix.shape[1]] = self.measured_matrix
+                self.measured_matrix = grown
             
-            self.measured_data[channel_idx] = voltage
-            self.time_measured[channel_idx] = time
+            self.measured_matrix[channel_idx, :num_samples] = voltage
+            self._meas_len[channel_idx] = num_samples
             
         except Exception as e:
             raise Exception(f"Error loading CSV file: {str(e)}")
     
-    def adc_to_mv(self, adc_values):
-        """Convert ADC values to mV - reverse of converter process"""
+    def get_measured_signal(self, channel):
+        """Return (time, signal) views of one measured channel trimmed to its length"""
+        n = self._meas_len[channel]
+        return self.measured_time[:n], self.measured_matrix[channel, :n]
+    
+    def get_measured_adjusted_mv(self):
+        """(time, mV signal) of the current channel with scale/offset applied, rebuilt only on change"""
+        measured_time, measured_signal = self.get_measured_signal(self.current_channel)
+        scale = self.scale_spinbox.value()
+        v_offset = self.signal_offset_spinbox.value()
+        
+        key = (self.current_channel, scale, v_offset, len(measured_signal))
+        if self._adjusted_key != key:
+            if self._measured_adjusted_mv is None or len(self._measured_adjusted_mv) != len(measured_signal):
+                self._measured_adjusted_mv = np.empty(len(measured_signal), dtype=np.float32)
+            
+            # Scale, offset and V to mV folded into one multiply-add
+            np.multiply(measured_signal, scale * 1000, out=self._measured_adjusted_mv)
+            self._measured_adjusted_mv += v_offset * 1000
+            self._adjusted_key = key
+        
+        return measured_time, self._measured_adjusted_mv
+    
+    def get_reference_range(self, channel, start, end):
+        """(min, max) of reference[start:end] from a per-block table; only the ragged edges are scanned"""
+        ref = self.get_reference_signal(channel)
+        block = self.minmax_block
+        
+        # Tables are dropped with _mv_cache; the identity check is a second guard
+        cached = self._ref_minmax_cache.get(channel)
+        if cached is None or cached[0] is not ref:
+            blocks = ref[:len(ref) // block * block].reshape(-1, block)
+            cached = (ref, blocks.min(axis=1), blocks.max(axis=1))
+            self._ref_minmax_cache[channel] = cached
+        _, block_min, block_max = cached
+        
+        # Full blocks covered by the window
+        b0 = -(-start // block)
+        b1 = end // block
+        if b0 >= b1:
+            segment = ref[start:end]
+            return segment.min(), segment.max()
+        
+        y_min = block_min[b0:b1].min()
+        y_max = block_max[b0:b1].max()
+        for edge in (ref[start:b0 * block], ref[b1 * block:end]):
+            if len(edge) > 0:
+                y_min = min(y_min, edge.min())
+                y_max = max(y_max, edge.max())
+        return y_min, y_max
+    
+    def get_reference_signal(self, channel):
+        """Reference channel in mV, converted from the ADC counts on first use"""
+        if channel not in self._mv_cache:
+            self._mv_cache[channel] = self.adc_to_mv(self._reference_adc[channel])
+        return self._mv_cache[channel]
+    
+    def update_adc_conversion(self):
+        """Precompute the affine ADC -> mV factors for the current gain/offset"""
         # ADC values are in range 0-4095 (12-bit)
-        # First convert to voltage (0-3.3V range)
-        voltage = adc_values * self.vcc / self.adc_resolution
-        
         # In the converter:
         # signal_gained = signal_mv * gain / 1000.0  (mV to V with gain)
         # signal_offset = signal_gained + offset_voltage
         # adc = signal_offset * 4095 / 3.3
         
-        # Reverse process:
-        # Remove offset by subtracting
-        voltage_no_offset = voltage - self.offset_voltage
-        
-        # Remove gain and convert back to mV
-        mv_signal = voltage_no_offset * 1000.0 / self.gain
+        # Reverse process: mv = (adc * vcc / resolution - offset_voltage) * 1000 / gain
+        self._adc_scale = (self.vcc / self.adc_resolution) * (1000.0 / self.gain)
+        self._adc_bias = -self.offset_voltage * 1000.0 / self.gain
+    
+    def adc_to_mv(self, adc_values):
+        """Convert ADC values to mV - reverse of converter process"""
+        # One multiply into a float32 result, then the bias added in place
+        mv_signal = np.multiply(adc_values, self._adc_scale, dtype=np.float32)
+        mv_signal += self._adc_bias
         
         return mv_signal
     
     # === NEW METRIC CALCULATION FUNCTIONS ===
     
-    def calculate_peak_error(self, ref_signal, measured_signal):
-        """Calculate peak error between reference and measured signals"""
-        try:
-            # Ensure same length
-            min_len = min(len(ref_signal), len(measured_signal))
-            ref = ref_signal[:min_len]
-            measured = measured_signal[:min_len]
-            
-            # Calculate absolute error
-            error = np.abs(ref - measured)
-            peak_error = np.max(error)
-            peak_index = np.argmax(error)
-            
-            return peak_error, peak_index
-            
-        except Exception as e:
-            print(f"Peak error calculation failed: {e}")
-            return 0, 0
+    def calculate_error_metrics(self, ref_signal, measured_signal):
+        """Calculate MSE, mean reference power and peak error from one noise buffer"""
+        n = len(ref_signal)
+        noise = self.work_buffer('noise', n, np.result_type(ref_signal, measured_signal))
+        np.subtract(ref_signal, measured_signal, out=noise)
+        
+        # Dot products reduce in one pass each
+        mse = np.dot(noise, noise) / n
+        signal_power = np.dot(ref_signal, ref_signal) / n
+        
+        # Peak absolute error, taken in place on the same buffer
+        np.abs(noise, out=noise)
+        peak_index = np.argmax(noise)
+        peak_error = noise[peak_index]
+        
+        return mse, signal_power, peak_error, peak_index
+    
+    def work_buffer(self, name, n, dtype):
+        """Length-n view of a grow-only scratch array; metrics worker thread only, never sent back"""
+        buf = self._work_buffers.get(name)
+        if buf is None or buf.dtype != dtype or len(buf) < n:
+            buf = np.empty(n, dtype=dtype)
+            self._work_buffers[name] = buf
+        return buf[:n]
+    
+    def normalize_signal(self, signal, out=None):
+        """Zero-mean, unit-std copy of signal (left zero-mean if flat), optionally into out"""
+        normalized = np.subtract(signal, np.mean(signal), out=out)
+        std = np.sqrt(np.dot(normalized, normalized) / len(normalized))
+        if std > 0:
+            normalized /= std
+        return normalized
     
-    def calculate_thd(self, signal, fs):
-        """Calculate Total Harmonic Distortion for ECG signal"""
+    def calculate_thd(self, signals, fs):
+        """Calculate Total Harmonic Distortion (%) for each row of signals in one batched FFT"""
+        signals = np.atleast_2d(signals)
+        thd = np.zeros(len(signals))
         try:
-            # Remove DC component
-            signal_ac = signal - np.mean(signal)
-            
-            # Apply window to reduce spectral leakage
-            windowed_signal = signal_ac * np.hanning(len(signal_ac))
-            
-            # FFT
-            N = len(windowed_signal)
-            fft_signal = fft(windowed_signal)
-            freqs = fftfreq(N, 1/fs)
-            
-            # Power spectrum (only positive frequencies)
-            power_spectrum = np.abs(fft_signal[:N//2])**2
-            freqs_positive = freqs[:N//2]
-            
-            # Find fundamental frequency in ECG range (0.5-3 Hz for heart rate)
-            freq_mask = (freqs_positive >= 0.5) & (freqs_positive <= 3.0)
-            
-            if not np.any(freq_mask):
-                return 0
-            
-            # Find peak in heart rate range
-            masked_power = power_spectrum[freq_mask]
-            if len(masked_power) == 0:
-                return 0
-                
-            fundamental_idx_local = np.argmax(masked_power)
-            fundamental_idx = np.where(freq_mask)[0][fundamental_idx_local]
+            # Remove DC component per row
+            signal_ac = signals - signals.mean(axis=1, keepdims=True)
+            n = signal_ac.shape[1]
+            
+            # Apply window to reduce spectral leakage (cached per length)
+            window = self._window_cache.get(n)
+            if window is None:
+                window = np.hanning(n)
+                if len(self._window_cache) >= 8:  # Overlap length drifts with time offset
+                    self._window_cache.clear()
+                self._window_cache[n] = window
+            signal_ac *= window
+            
+            # Real FFT of every row at exactly n points - padding would move the bin grid
+            fft_signal = rfft(signal_ac, axis=-1, workers=-1)
+            
+            # Power spectrum of the first n//2 bins (positive frequencies, as fftfreq lays them out)
+            half = n // 2
+            power_spectrum = fft_signal[:, :half].real**2 + fft_signal[:, :half].imag**2
+            freqs_positive = np.arange(half) * (fs / n)
+            
+            # Find fundamental frequency in ECG range (0.5-3 Hz for heart rate) - a contiguous bin band
+            band = np.flatnonzero((freqs_positive >= 0.5) & (freqs_positive <= 3.0))
+            if len(band) == 0:
+                return thd
+            
+            rows = np.arange(len(power_spectrum))
+            fundamental_idx = band[0] + np.argmax(power_spectrum[:, band[0]:band[-1] + 1], axis=1)
             fundamental_freq = freqs_positive[fundamental_idx]
-            fundamental_power = power_spectrum[fundamental_idx]
-            
-            # Calculate harmonic powers
-            harmonic_power_sum = 0
-            harmonics_found = 0
+            fundamental_power = power_spectrum[rows, fundamental_idx]
+            
+            # Sum the 2nd to 9th harmonics below Nyquist; h * f0 falls exactly on bin h * idx
+            # (the last bin stands in when that is just past the n//2 positive bins)
+            harmonic_power_sum = np.zeros(len(power_spectrum))
+            harmonics_found = np.zeros(len(power_spectrum), dtype=int)
+            for h in range(2, 10):
+                below_nyquist = h * fundamental_freq < fs / 2
+                harmonic_idx = np.minimum(h * fundamental_idx, half - 1)
+                harmonic_power_sum += np.where(below_nyquist, power_spectrum[rows, harmonic_idx], 0)
+                harmonics_found += below_nyquist
+            
+            # Calculate THD (percentage) where there is a fundamental and at least one harmonic
+            valid = (fundamental_power > 0) & (harmonics_found > 0)
+            thd[valid] = np.sqrt(harmonic_power_sum[valid] / fundamental_power[valid]) * 100
+            return thd
             
-            for h in range(2, 10):  # 2nd to 9th harmonic
-                harmonic_freq = h * fundamental_freq
-                
-                # Check if harmonic is within Nyquist frequency
-                if harmonic_freq >= fs/2:
-                    break
-                
-                # Find closest frequency bin to harmonic
-                harmonic_idx = np.argmin(np.abs(freqs_positive - harmonic_freq))
-                
-                # Check if we're close enough to the harmonic (within frequency resolution)
-                freq_resolution = fs / N
-                if np.abs(freqs_positive[harmonic_idx] - harmonic_freq) <= freq_resolution:
-                    harmonic_power_sum += power_spectrum[harmonic_idx]
-                    harmonics_found += 1
-            
-            # Calculate THD
-            if fundamental_power > 0 and harmonics_found > 0:
-                thd = np.sqrt(harmonic_power_sum) / np.sqrt(fundamental_power)
-                return thd * 100  # Convert to percentage
-            else:
-                return 0
-                
         except Exception as e:
             print(f"THD calculation failed: {e}")
-            return 0
+            return thd
     
     def calculate_cross_correlation_metrics(self, ref_signal, measured_signal):
         """Calculate cross-correlation coefficient and lag"""
@@ -568,23 +710,30 @@ class ECGSignalValidator10(QMainWindow):
             measured = measured_signal[:min_len]
             
             # Normalize signals (remove mean and scale by std)
-            ref_norm = (ref - np.mean(ref))
-            measured_norm = (measured - np.mean(measured))
-            
-            if np.std(ref_norm) > 0:
-                ref_norm = ref_norm / np.std(ref_norm)
-            if np.std(measured_norm) > 0:
-                measured_norm = measured_norm / np.std(measured_norm)
-            
-            # Calculate cross-correlation
-            correlation = scipy_signal.correlate(ref_norm, measured_norm, mode='full')
+            ref_norm = self.normalize_signal(ref, out=self.work_buffer('ref_norm', min_len, ref.dtype))
+            measured_norm = self.normalize_signal(measured, out=self.work_buffer('measured_norm', min_len, measured.dtype))
+            
+            max_lag = self.correlation_lag_limit(min_len)
+            lags = np.arange(-(max_lag - 1), max_lag)
+            
+            if len(lags) <= self.direct_xcorr_max_lags:
+                # Short window: every lag from one product of shifted reference views with the
+                # measured signal (O(N*L), no FFT buffers); zero padding covers the partial overlaps
+                padded = self.work_buffer('ref_padded', min_len + 2 * (max_lag - 1), ref_norm.dtype)
+                padded[:] = 0
+                padded[max_lag - 1:max_lag - 1 + min_len] = ref_norm
+                correlation = sliding_window_view(padded, min_len) @ measured_norm
+            else:
+                # Calculate cross-correlation (FFT path, padded to a fast length internally)
+                correlation = scipy_signal.correlate(ref_norm, measured_norm, mode='full', method='fft')
+                center = min_len - 1  # Index of zero lag
+                correlation = correlation[center - max_lag + 1:center + max_lag]
             
             # Find peak correlation
             peak_corr_idx = np.argmax(np.abs(correlation))
             peak_corr = correlation[peak_corr_idx]
             
             # Calculate lag (in samples)
-            lags = scipy_signal.correlation_lags(len(ref_norm), len(measured_norm), mode='full')
             peak_lag = lags[peak_corr_idx]
             
             # Normalize correlation coefficient
@@ -596,6 +745,11 @@ class ECGSignalValidator10(QMainWindow):
             print(f"Cross-correlation calculation failed: {e}")
             return 0, 0
     
+    def correlation_lag_limit(self, n):
+        """Lag count searched either side of zero by the correlation metric for n-sample overlaps"""
+        # Physiological lag is bounded, so only search |lag| < max_correlation_lag
+        return min(max(1, int(self.reference_sample_rate * self.max_correlation_lag)), n)
+    
     # === MODIFIED EXISTING FUNCTIONS ===
     
     def change_channel(self, index):
@@ -619,22 +773,37 @@ class ECGSignalValidator10(QMainWindow):
     def update_gain(self, value):
         """Update gain and recalculate reference signal"""
         self.gain = value
-        self.load_all_data()  # Reload to recalculate with new gain
+        self.update_adc_conversion()
+        # Gain/offset changed, so every converted channel and its min/max table is stale
+        self._mv_cache.clear()
+        self._ref_minmax_cache.clear()
+        self.update_plots()
     
     def update_offset(self, value):
         """Update offset voltage"""
         self.offset_voltage = value
         self.offset_adc = int(value * self.adc_resolution / self.vcc)
-        self.load_all_data()  # Reload to recalculate
+        self.update_adc_conversion()
+        # Gain/offset changed, so every converted channel and its min/max table is stale
+        self._mv_cache.clear()
+        self._ref_minmax_cache.clear()
+        self.update_plots()
     
     def update_measured_sample_rate(self, value):
         """Update measured sample rate and reload CSVs"""
         self.measured_sample_rate = value
         self.load_all_data()
     
+    def overlap_slice(self, t0, fs, n, time_start, time_end):
+        """Slice of a uniform grid t0 + i/fs (n samples) lying within [time_start, time_end]"""
+        eps = 1e-9  # Absorb float error so samples on the boundary are kept
+        i0 = max(0, int(np.ceil((time_start - t0) * fs - eps)))
+        i1 = min(n, int(np.floor((time_end - t0) * fs + eps)) + 1)
+        return slice(i0, max(i0, i1))
+    
     def calculate_snr_mse(self):
-        """Calculate SNR, MSE and all additional metrics"""
-        if self.reference_data is None or self.current_channel not in self.measured_data:
+        """Resample the overlap and request SNR, MSE and all additional metrics"""
+        if self._reference_adc is None or self.measured_matrix is None:
             self.snr_label.setText("SNR: -- dB")
             self.mse_label.setText("MSE: --")
             self.peak_error_label.setText("Peak Error: -- mV")
@@ -644,24 +813,16 @@ class ECGSignalValidator10(QMainWindow):
         
         try:
             # Get reference signal
-            ref_signal = self.reference_data[self.current_channel]
+            ref_signal = self.get_reference_signal(self.current_channel)
             ref_time = self.time_reference
             
-            # Get measured signal with adjustments
-            measured_signal = self.measured_data[self.current_channel]
-            measured_time = self.time_measured[self.current_channel] + self.time_offset
-            
-            # Apply scale and offset to measured signal
-            scale = self.scale_spinbox.value()
-            v_offset = self.signal_offset_spinbox.value()
-            measured_adjusted = measured_signal * scale + v_offset
-            
-            # Convert measured signal from V to mV for consistent units
-            measured_adjusted_mv = measured_adjusted * 1000
+            # Get measured time axis (time offset applied to the endpoints only)
+            measured_time = self.get_measured_signal(self.current_channel)[0]
+            measured_t0 = measured_time[0] + self.time_offset
             
             # Find overlapping time range
-            time_start = max(ref_time[0], measured_time[0])
-            time_end = min(ref_time[-1], measured_time[-1])
+            time_start = max(ref_time[0], measured_t0)
+            time_end = min(ref_time[-1], measured_time[-1] + self.time_offset)
             
             if time_start >= time_end:
                 self.snr_label.setText("SNR: No overlap")
@@ -671,130 +832,252 @@ class ECGSignalValidator10(QMainWindow):
                 self.correlation_label.setText("Correlation: No overlap")
                 return
             
-            # Get indices for overlapping region
-            ref_mask = (ref_time >= time_start) & (ref_time <= time_end)
-            measured_mask = (measured_time >= time_start) & (measured_time <= time_end)
-            
-            ref_overlap = ref_signal[ref_mask]
-            measured_time_overlap = measured_time[measured_mask]
-            measured_overlap = measured_adjusted_mv[measured_mask]
-            
-            # Resample measured signal to match reference sample rate
-            if len(ref_overlap) != len(measured_overlap):
-                # Use interpolation to match sample points
-                f_interp = interp1d(measured_time_overlap, measured_overlap, 
-                                   kind='linear', bounds_error=False, fill_value='extrapolate')
-                measured_resampled = f_interp(ref_time[ref_mask])
+            # Both time axes are uniform, so the overlap is a plain slice
+            ref_slice = self.overlap_slice(ref_time[0], self.reference_sample_rate, len(ref_time), time_start, time_end)
+            measured_slice = self.overlap_slice(measured_t0, self.measured_sample_rate, len(measured_time), time_start, time_end)
+            
+            ref_overlap = ref_signal[ref_slice]
+            
+            # Reuse the resampling grids while only scale/offset/channel change
+            key = (ref_slice.start, ref_slice.stop, measured_slice.start, measured_slice.stop, self.time_offset)
+            if self._interp_cache['key'] != key:
+                self._interp_cache['key'] = key
+                self._interp_cache['x_target'] = ref_time[ref_slice]
+                self._interp_cache['xp'] = measured_time[measured_slice] + self.time_offset
+            
+            # Scaled mV signal comes from the persistent adjusted buffer
+            measured_overlap = self.get_measured_adjusted_mv()[1][measured_slice]
+            
+            # Resample measured signal to match reference sample rate, unless the measured
+            # samples already sit on the reference grid (same rate, whole-sample time offset)
+            shift = self.time_offset * self.reference_sample_rate
+            on_grid = (self.measured_sample_rate == self.reference_sample_rate
+                       and abs(shift - round(shift)) < 1e-6)
+            if not on_grid:
+                # Linear interpolation onto the reference grid (edges hold the end values);
+                # np.interp always returns float64, so bring it back to the float32 metric path
+                measured_resampled = np.interp(self._interp_cache['x_target'], self._interp_cache['xp'],
+                                               measured_overlap).astype(np.float32)
             else:
-                measured_resampled = measured_overlap
+                # Direct slice; copied, since the buffer is rewritten while the worker thread reads this
+                measured_resampled = measured_overlap.copy()
             
             # Ensure same length
             min_len = min(len(ref_overlap), len(measured_resampled))
             ref_overlap = ref_overlap[:min_len]
             measured_resampled = measured_resampled[:min_len]
             
-            # === EXISTING CALCULATIONS: MSE and SNR ===
-            # Calculate MSE
-            mse = np.mean((ref_overlap - measured_resampled) ** 2)
-            
-            # Calculate SNR
-            signal_rms = np.sqrt(np.mean(ref_overlap ** 2))
-            noise = ref_overlap - measured_resampled
-            noise_rms = np.sqrt(np.mean(noise ** 2))
-            
-            if noise_rms > 0:
-                snr_db = 20 * np.log10(signal_rms / noise_rms)
-            else:
-                snr_db = float('inf')
-            
-            # === NEW CALCULATIONS: Additional Metrics ===
-            # Calculate Peak Error
-            peak_error, peak_idx = self.calculate_peak_error(ref_overlap, measured_resampled)
-            
-            # Calculate THD (using reference signal)
-            thd = self.calculate_thd(ref_overlap, self.reference_sample_rate)
-            
-            # Calculate Cross-Correlation
-            correlation, lag = self.calculate_cross_correlation_metrics(ref_overlap, measured_resampled)
-            
-            # === UPDATE ALL DISPLAYS ===
-            # Existing displays
-            if np.isfinite(snr_db):
-                self.snr_label.setText(f"SNR: {snr_db:.1f} dB")
-            else:
-                self.snr_label.setText("SNR: ∞ dB")
-                
-            self.mse_label.setText(f"MSE: {(mse/100000):.3f}")
+            # Hand the heavy metric pipeline to the worker thread
+            overlap_duration = time_end - time_start
             
-            # New metric displays
-            self.peak_error_label.setText(f"Peak Error: {peak_error/10:.2f} mV")
-            self.thd_label.setText(f"THD: {thd/10:.2f} %")
-            self.correlation_label.setText(f"Correlation: {correlation:.3f}")
+            # THD only depends on the reference span and is invariant to the ADC gain/offset,
+            # so a cache miss sends the raw ADC row view (no mV conversion, no copy)
+            thd_key = (self._load_generation, self.current_channel, ref_slice.start, min_len)
+            thd = self._thd_cache.get(thd_key)
+            thd_signal = None
+            if thd is None:
+                thd_signal = self._reference_adc[self.current_channel, ref_slice.start:ref_slice.start + min_len]
+            thd_request = (thd, thd_signal)
+            context = (self.channel_names[self.current_channel], overlap_duration, min_len, thd_key)
             
-            # Additional info in status
-            overlap_duration = time_end - time_start
-            lag_time = lag / self.reference_sample_rate if self.reference_sample_rate > 0 else 0
-            channel_name = self.channel_names[self.current_channel]
-            self.status_label.setText(
-                f"Status: {channel_name} - Overlap {overlap_duration:.2f}s, {min_len} samples, Lag: {lag_time:.3f}s"
-            )
+            self.metrics_requested.emit(ref_overlap, measured_resampled, self.reference_sample_rate,
+                                        thd_request, context)
             
         except Exception as e:
-            # Reset all displays on error
-            self.snr_label.setText("SNR: Error")
-            self.mse_label.setText("MSE: Error")
-            self.peak_error_label.setText("Peak Error: Error")
-            self.thd_label.setText("THD: Error")
-            self.correlation_label.setText("Correlation: Error")
-            self.status_label.setText(f"Error: {str(e)}")
-            print(f"10-lead metrics calculation error: {e}")
+            self.show_metrics_error(e)
+    
+    def calculate_all_metrics(self):
+        """SNR, MSE, peak error, THD and peak cross-correlation for all 10 leads in one vectorized pass"""
+        if self._reference_adc is None or self.measured_matrix is None:
+            return None
+        
+        # All leads share one measured time axis; use the span every lead covers
+        n_meas = int(self._meas_len.min())
+        if n_meas < 2:
+            return None
+        
+        ref_time = self.time_reference
+        measured_t0 = self.measured_time[0] + self.time_offset
+        time_start = max(ref_time[0], measured_t0)
+        time_end = min(ref_time[-1], self.measured_time[n_meas - 1] + self.time_offset)
+        if time_start >= time_end:
+            return None
+        
+        ref_slice = self.overlap_slice(ref_time[0], self.reference_sample_rate, len(ref_time), time_start, time_end)
+        ref_matrix = np.stack([self.get_reference_signal(ch)[ref_slice] for ch in range(10)])
+        
+        # Linear interpolation weights onto the reference grid, computed once for every lead
+        pos = (ref_time[ref_slice] - measured_t0) * self.measured_sample_rate
+        np.clip(pos, 0, n_meas - 1, out=pos)
+        idx = np.minimum(pos.astype(np.intp), n_meas - 2)
+        w = (pos - idx).astype(np.float32)
+        measured = self.measured_matrix[:, :n_meas]
+        meas_matrix = measured[:, idx] * (1 - w) + measured[:, idx + 1] * w
+        
+        # Apply scale and offset, converting V to mV for consistent units
+        scale = self.scale_spinbox.value()
+        v_offset = self.signal_offset_spinbox.value()
+        meas_matrix *= scale
+        meas_matrix += v_offset
+        meas_matrix *= 1000
+        
+        n = ref_matrix.shape[1]
+        err = ref_matrix - meas_matrix
+        mse = np.einsum('ij,ij->i', err, err) / n
+        signal_power = np.einsum('ij,ij->i', ref_matrix, ref_matrix) / n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            snr_db = 10 * np.log10(signal_power / mse)
+        np.abs(err, out=err)
+        peak_error = err.max(axis=1)
+        
+        # Same metric as the single-lead label: peak of the bounded-lag cross-correlation of the
+        # z-scored leads over N, with every row correlated through one batched FFT
+        for matrix in (ref_matrix, meas_matrix):
+            matrix -= matrix.mean(axis=1, keepdims=True)
+            std = np.sqrt(np.einsum('ij,ij->i', matrix, matrix) / n)[:, None]
+            np.divide(matrix, std, out=matrix, where=std > 0)
+        n_fft = next_fast_len(2 * n - 1, real=True)
+        spectrum = rfft(ref_matrix, n_fft, axis=-1, workers=-1)
+        spectrum *= np.conj(rfft(meas_matrix, n_fft, axis=-1, workers=-1))
+        full = irfft(spectrum, n_fft, axis=-1, workers=-1)
+        max_lag = self.correlation_lag_limit(n)
+        window = full[:, np.arange(-(max_lag - 1), max_lag)]  # Negative lags wrap to the end
+        peak = np.argmax(np.abs(window), axis=1)
+        correlation = window[np.arange(10), peak] / n
+        
+        # THD of every lead in one batched FFT, straight from the raw ADC columns
+        thd = self.calculate_thd(self._reference_adc[:, ref_slice], self.reference_sample_rate)
+        
+        return {'snr_db': snr_db, 'mse': mse, 'peak_error': peak_error, 'thd': thd,
+                'correlation': correlation}
+    
+    def print_all_metrics(self):
+        """Print a per-lead metrics table for all 10 channels"""
+        metrics = self.calculate_all_metrics()
+        if metrics is None:
+            self.status_label.setText("Status: No overlapping data for all-lead metrics")
+            return
+        
+        # Same display scaling as the single-lead labels in show_metrics
+        print("\n10-Lead validation metrics:")
+        for i, name in enumerate(self.channel_names):
+            print(f"{name:>3}: SNR={metrics['snr_db'][i]:6.1f} dB, MSE={metrics['mse'][i]/100000:.3f}, "
+                  f"Peak Error={metrics['peak_error'][i]/10:.2f} mV, THD={metrics['thd'][i]/10:.2f} %, "
+                  f"Correlation={metrics['correlation'][i]:.3f}")
+        self.status_label.setText("Status: All-lead metrics printed to console")
+    
+    def compute_metrics(self, ref_overlap, measured_resampled, fs, thd_request):
+        """Compute all validation metrics (runs on the metrics worker thread)"""
+        # === EXISTING CALCULATIONS: MSE and SNR ===
+        # Calculate MSE, mean signal power and peak error from one noise buffer
+        mse, signal_power, peak_error, peak_idx = self.calculate_error_metrics(ref_overlap, measured_resampled)
+        
+        # Calculate SNR (power ratio, so no square roots needed)
+        # Scalar math avoids ufunc dispatch; math.log10 rejects 0, so a silent reference is -inf
+        if mse > 0:
+            snr_db = 10 * math.log10(signal_power / mse) if signal_power > 0 else float('-inf')
+        else:
+            snr_db = float('inf')
+        
+        # === NEW CALCULATIONS: Additional Metrics ===
+        # Calculate THD (using reference signal) unless the GUI thread had it cached
+        thd, thd_signal = thd_request
+        if thd is None:
+            thd = self.calculate_thd(thd_signal, fs)[0]
+        
+        # Calculate Cross-Correlation
+        correlation, lag = self.calculate_cross_correlation_metrics(ref_overlap, measured_resampled)
+        
+        # Plain Python scalars, so the label f-strings format natively instead of via NumPy
+        return float(snr_db), float(mse), float(peak_error), float(thd), float(correlation), int(lag)
+    
+    def show_metrics(self, results, context):
+        """Display metrics posted back by the worker thread"""
+        if isinstance(results, Exception):
+            self.show_metrics_error(results)
+            return
+        
+        snr_db, mse, peak_error, thd, correlation, lag = results
+        channel_name, overlap_duration, min_len, thd_key = context
+        
+        # Remember THD for this span, so revisiting it skips the FFT
+        if len(self._thd_cache) >= 64:
+            self._thd_cache.clear()
+        self._thd_cache[thd_key] = thd
+        
+        # === UPDATE ALL DISPLAYS ===
+        # Existing displays
+        if math.isfinite(snr_db):
+            self.snr_label.setText(f"SNR: {snr_db:.1f} dB")
+        else:
+            self.snr_label.setText("SNR: ∞ dB")
+            
+        self.mse_label.setText(f"MSE: {(mse/100000):.3f}")
+        
+        # New metric displays
+        self.peak_error_label.setText(f"Peak Error: {peak_error/10:.2f} mV")
+        self.thd_label.setText(f"THD: {thd/10:.2f} %")
+        self.correlation_label.setText(f"Correlation: {correlation:.3f}")
+        
+        # Additional info in status
+        lag_time = lag / self.reference_sample_rate if self.reference_sample_rate > 0 else 0
+        self.status_label.setText(
+            f"Status: {channel_name} - Overlap {overlap_duration:.2f}s, {min_len} samples, Lag: {lag_time:.3f}s"
+        )
+    
+    def show_metrics_error(self, e):
+        """Reset all metric displays after a failed calculation"""
+        self.snr_label.setText("SNR: Error")
+        self.mse_label.setText("MSE: Error")
+        self.peak_error_label.setText("Peak Error: Error")
+        self.thd_label.setText("THD: Error")
+        self.correlation_label.setText("Correlation: Error")
+        self.status_label.setText(f"Error: {str(e)}")
+        print(f"10-lead metrics calculation error: {e}")
     
     def update_time_offset(self, value):
         """Update time offset for measured signal"""
         self.time_offset = value
-        self.update_plots()
-        self.calculate_snr_mse()  # Recalculate metrics
+        self._schedule_update()
     
     def change_window_size(self, value):
         """Change display window size"""
         self.window_size = value
         # Update navigation slider
-        if self.reference_data is not None:
-            max_samples = len(self.reference_data[0])
+        if self._reference_adc is not None:
+            max_samples = len(self.time_reference)
             self.nav_slider.setMaximum(max(0, max_samples - self.window_size))
-        self.update_plots()
+        self._schedule_update()
     
     def navigate_signal(self, value):
         """Navigate through signal"""
         self.current_index = value
-        self.update_plots()
+        self._schedule_update()
     
     def auto_align_signals(self):
         """Automatically align signals using cross-correlation"""
-        if self.reference_data is None or self.current_channel not in self.measured_data:
+        if self._reference_adc is None or self.measured_matrix is None:
             return
         
         try:
             # Get current channel data
-            ref_signal = self.reference_data[self.current_channel]
-            measured_signal = self.measured_data[self.current_channel]
-            
-            # Resample measured signal to match reference sample rate
-            if len(measured_signal) != len(ref_signal):
-                f = interp1d(self.time_measured[self.current_channel], 
-                           measured_signal, kind='linear', 
-                           bounds_error=False, fill_value=0)
-                measured_resampled = f(self.time_reference)
-            else:
-                measured_resampled = measured_signal
+            ref_signal = self.get_reference_signal(self.current_channel)
+            measured_resampled = self.resample_to_reference(self.current_channel)
             
-            # Normalize signals for correlation
-            ref_norm = (ref_signal - np.mean(ref_signal)) / np.std(ref_signal)
-            measured_norm = (measured_resampled - np.mean(measured_resampled)) / np.std(measured_resampled)
+            # Normalize the measured signal into a reusable buffer (the reference is cached below)
+            n = len(ref_signal)
+            if self._measured_norm_buf is None or len(self._measured_norm_buf) != n:
+                self._measured_norm_buf = np.empty(n, dtype=np.result_type(measured_resampled, np.float32))
+            measured_norm = self.normalize_signal(measured_resampled, out=self._measured_norm_buf)
             
-            # Cross-correlation
-            correlation = scipy_signal.correlate(measured_norm, ref_norm, mode='same')
-            lag = np.argmax(correlation) - len(correlation) // 2
+            # Cross-correlation via FFT, zero-padded to a fast length so it is linear, not circular
+            n_fft = next_fast_len(2 * n - 1, real=True)
+            ref_spectrum = self.get_reference_spectrum(ref_signal, n_fft)
+            full = irfft(rfft(measured_norm, n_fft, workers=-1) * ref_spectrum, n_fft, workers=-1)
+            
+            # Same lag window as correlate(mode='same'); negative lags wrap to the end
+            lags = np.arange(-(n // 2), n - n // 2)
+            lag = lags[np.argmax(full[lags])]
             
             # Convert lag to time offset
             time_offset = lag / self.reference_sample_rate
@@ -808,13 +1091,138 @@ class ECGSignalValidator10(QMainWindow):
         except Exception as e:
             QMessageBox.warning(self, "Warning", f"Auto-align failed: {str(e)}")
     
+    def auto_align_all_leads(self):
+        """Align on the median cross-correlation lag of all 10 leads"""
+        if self._reference_adc is None or self.measured_matrix is None:
+            return
+        
+        try:
+            lags, usable = self.estimate_all_channel_lags()
+            
+            print("\n10-Lead alignment lags:")
+            for name, lag, ok in zip(self.channel_names, lags, usable):
+                if ok:
+                    print(f"{name:>3}: {lag / self.reference_sample_rate:.3f}s ({lag} samples)")
+                else:
+                    print(f"{name:>3}: skipped (flat, non-finite or mock data)")
+            
+            if not np.any(usable):
+                self.status_label.setText("Status: No usable lead for auto-align (flat, non-finite or mock data)")
+                return
+            
+            # One shared time offset, so take the median of the usable leads to ignore outliers
+            time_offset = float(np.median(lags[usable])) / self.reference_sample_rate
+            self.time_offset_spinbox.setValue(time_offset)
+            self.status_label.setText(f"Auto-aligned all leads with median offset: {time_offset:.3f}s")
+            
+        except Exception as e:
+            QMessageBox.warning(self, "Warning", f"Auto-align failed: {str(e)}")
+    
+    def estimate_all_channel_lags(self):
+        """(lags, usable) for every lead, batched through one 2-D FFT; lags are in reference samples"""
+        n = len(self.time_reference)
+        ref_matrix = np.stack([self.get_reference_signal(ch) for ch in range(10)])
+        measured_matrix = np.empty((10, n), dtype=np.float32)
+        for ch in range(10):
+            self.resample_to_reference(ch, out=measured_matrix[ch])
+        
+        # Mock rows, captures with NaN/inf and flat rows (zero std) carry no alignment information;
+        # flatness is tested on the raw values, as a centred constant leaves float rounding noise
+        usable = ~self._mock_channels & np.isfinite(measured_matrix).all(axis=1)
+        measured_matrix[~usable] = 0
+        usable &= (np.ptp(ref_matrix, axis=1) > 0) & (np.ptp(measured_matrix, axis=1) > 0)
+        
+        # Row-wise z-score in place (flat rows are left zero-mean)
+        for matrix in (ref_matrix, measured_matrix):
+            matrix -= matrix.mean(axis=1, keepdims=True)
+            std = np.sqrt(np.einsum('ij,ij->i', matrix, matrix) / n)[:, None]
+            np.divide(matrix, std, out=matrix, where=std > 0)
+        
+        # Linear cross-correlation of all rows at once along the last axis
+        n_fft = next_fast_len(2 * n - 1, real=True)
+        spectrum = rfft(measured_matrix, n_fft, axis=-1, workers=-1)
+        spectrum *= np.conj(rfft(ref_matrix, n_fft, axis=-1, workers=-1))
+        full = irfft(spectrum, n_fft, axis=-1, workers=-1)
+        
+        # Same lag window as the single-lead auto-align
+        lags = np.arange(-(n // 2), n - n // 2)
+        return lags[np.argmax(full[:, lags], axis=1)], usable
+    
+    def resample_to_reference(self, channel, out=None):
+        """Measured channel linearly resampled onto the reference grid (zero past its end)"""
+        measured_signal = self.get_measured_signal(channel)[1]
+        n = len(self.time_reference)
+        
+        # Same rate means the grids coincide - alias, or copy/truncate, instead of interpolating
+        if self.measured_sample_rate == self.reference_sample_rate:
+            if out is None and len(measured_signal) == n:
+                return measured_signal
+            if out is None:
+                out = np.empty(n, dtype=measured_signal.dtype)
+            m = min(n, len(measured_signal))
+            out[:m] = measured_signal[:m]
+            out[m:] = 0
+            return out
+        
+        if out is None:
+            out = np.empty(n, dtype=measured_signal.dtype)
+        idx, w = self._align_weights[len(measured_signal)]
+        resampled = out[:len(idx)]
+        np.multiply(measured_signal[idx], 1 - w, out=resampled)
+        resampled += measured_signal[idx + 1] * w
+        out[len(idx):] = 0
+        return out
+    
+    def build_align_weights(self, n):
+        """Gather indices and weights for linear interpolation of n measured samples onto the reference grid"""
+        # Both grids are uniform from t=0, so positions follow directly from the rate ratio
+        pos = self.time_reference * self.measured_sample_rate
+        pos = pos[:np.searchsorted(pos, n - 1, side='right')]  # Reference samples past the data stay zero
+        idx = np.minimum(pos.astype(np.intp), n - 2)
+        w = (pos - idx).astype(np.float32)
+        return idx, w
+    
+    def get_reference_spectrum(self, ref_signal, n_fft):
+        """Conjugate FFT of the normalized reference, reused while the reference is unchanged"""
+        cache = self._ref_spectrum_cache
+        if cache['ref'] is not ref_signal or cache['n_fft'] != n_fft:
+            # Normalization only happens on a miss, so repeat alignments skip it entirely
+            cache['spectrum'] = np.conj(rfft(self.normalize_signal(ref_signal), n_fft, workers=-1))
+            cache['ref'] = ref_signal
+            cache['n_fft'] = n_fft
+        return cache['spectrum']
+    
+    def _schedule_update(self):
+        """Throttle interactive changes - at most one redraw per 16 ms while events keep coming"""
+        if not self._redraw_timer.isActive():
+            self._redraw_timer.start()
+    
+    def _do_update_plots(self):
+        """Deferred redraw fired by the throttle timer"""
+        self.update_plots()
+    
+    def as_plot_array(self, values):
+        """Contiguous float32 sample buffer for setData (no copy if already one); time axes stay float64"""
+        return np.ascontiguousarray(values, dtype=np.float32)
+    
+    def set_y_range(self, plot_widget, y_min, y_max):
+        """setYRange snapped outward to ~5% steps, skipped while the snapped range is unchanged"""
+        span = float(y_max - y_min)
+        # Power-of-two step keeps the bucket grid stable as the span drifts (2.5-5% of span)
+        step = 0.05 * 2.0 ** math.ceil(math.log2(span)) if span > 0 else 1.0
+        y_range = (math.floor(y_min / step) * step, math.ceil(y_max / step) * step)
+        if self._last_yrange.get(plot_widget) == y_range:
+            return
+        plot_widget.setYRange(*y_range, padding=0.1)
+        self._last_yrange[plot_widget] = y_range
+    
     def update_plots(self):
         """Update all plots with current data"""
-        if self.reference_data is None:
+        if self._reference_adc is None:
             return
         
         # Get current channel data
-        ref_data = self.reference_data[self.current_channel]
+        ref_data = self.get_reference_signal(self.current_channel)
         
         # Calculate visible range
         start_idx = self.current_index
@@ -825,22 +1233,18 @@ class ECGSignalValidator10(QMainWindow):
         ref_data_visible = ref_data[start_idx:end_idx]
         
         # Measured data
-        if self.current_channel in self.measured_data:
-            measured_data = self.measured_data[self.current_channel]
-            measured_time = self.time_measured[self.current_channel] + self.time_offset
-            
-            # Apply scale and offset to measured signal
-            scale = self.scale_spinbox.value()
-            v_offset = self.signal_offset_spinbox.value()
-            measured_data_adjusted = measured_data * scale + v_offset
-            
-            # Find visible range for measured data
-            time_start = ref_time_visible[0]
-            time_end = ref_time_visible[-1]
-            
-            mask = (measured_time >= time_start) & (measured_time <= time_end)
-            measured_time_visible = measured_time[mask]
-            measured_data_visible = measured_data_adjusted[mask]
+        if self.measured_matrix is not None:
+            measured_time, measured_adjusted = self.get_measured_adjusted_mv()
+            
+            # Find visible range for measured data (time axis is sorted, so binary search)
+            time_start = ref_time_visible[0] - self.time_offset
+            time_end = ref_time_visible[-1] - self.time_offset
+            lo = np.searchsorted(measured_time, time_start, 'left')
+            hi = np.searchsorted(measured_time, time_end, 'right')
+            
+            # Scaled mV samples are a view of the persistent buffer; only time needs the offset
+            measured_time_visible = measured_time[lo:hi] + self.time_offset
+            measured_data_visible = measured_adjusted[lo:hi]
         else:
             measured_time_visible = ref_time_visible
             measured_data_visible = np.zeros_like(ref_data_visible)
@@ -850,44 +1254,55 @@ class ECGSignalValidator10(QMainWindow):
         
         if self.display_mode == "side_by_side":
             # Update reference plot
-            self.ref_plot_line.setData(ref_time_visible, ref_data_visible)
+            self.ref_plot_line.setData(ref_time_visible, self.as_plot_array(ref_data_visible))
             self.ref_plot_widget.setTitle(f"Reference Signal - Channel {channel_name}")
             
             # Update measured plot
-            self.measured_plot_line.setData(measured_time_visible, measured_data_visible)
+            self.measured_plot_line.setData(measured_time_visible, self.as_plot_array(measured_data_visible))
             scale = self.scale_spinbox.value()
             v_offset = self.signal_offset_spinbox.value()
             self.measured_plot_widget.setTitle(f"Measured Signal - Channel {channel_name} (Scale: {scale:.1f}x, Offset: {v_offset:.3f}V)")
             
             # Auto-range Y axis
             if len(ref_data_visible) > 0:
-                self.ref_plot_widget.setYRange(ref_data_visible.min(), ref_data_visible.max(), padding=0.1)
+                ref_min, ref_max = self.get_reference_range(self.current_channel, start_idx, end_idx)
+                self.set_y_range(self.ref_plot_widget, ref_min, ref_max)
             if len(measured_data_visible) > 0 and np.any(measured_data_visible != 0):
-                self.measured_plot_widget.setYRange(measured_data_visible.min(), measured_data_visible.max(), padding=0.1)
+                self.set_y_range(self.measured_plot_widget, measured_data_visible.min(), measured_data_visible.max())
             
         else:  # overlay mode
-            # Convert measured signal to mV for comparison (assuming it's in volts)
-            measured_mv = measured_data_visible * 1000 if len(measured_data_visible) > 0 else np.zeros_like(ref_data_visible)
+            # Measured window is already in mV
+            measured_mv = measured_data_visible if len(measured_data_visible) > 0 else np.zeros_like(ref_data_visible)
             
             # Update overlay plot
-            self.overlay_ref_line.setData(ref_time_visible, ref_data_visible)
-            self.overlay_measured_line.setData(measured_time_visible, measured_mv)
+            self.overlay_ref_line.setData(ref_time_visible, self.as_plot_array(ref_data_visible))
+            self.overlay_measured_line.setData(measured_time_visible, self.as_plot_array(measured_mv))
             scale = self.scale_spinbox.value()
             v_offset = self.signal_offset_spinbox.value()
             self.overlay_plot.setTitle(f"Signal Comparison - Channel {channel_name} (Scale: {scale:.1f}x, Offset: {v_offset:.3f}V)")
             
             # Auto-range
-            if len(ref_data_visible) > 0 and len(measured_mv) > 0:
-                all_data = np.concatenate([ref_data_visible, measured_mv])
-                if np.any(all_data != 0):
-                    self.overlay_plot.setYRange(all_data.min(), all_data.max(), padding=0.1)
+            if ref_data_visible.size and measured_mv.size:
+                # Combine per-array extremes instead of concatenating the two windows
+                ref_min, ref_max = self.get_reference_range(self.current_channel, start_idx, end_idx)
+                y_min = min(ref_min, measured_mv.min())
+                y_max = max(ref_max, measured_mv.max())
+                if y_min != 0 or y_max != 0:
+                    self.set_y_range(self.overlay_plot, y_min, y_max)
         
         # Update X range
         if len(ref_time_visible) > 0:
             self.ref_plot_widget.setXRange(ref_time_visible[0], ref_time_visible[-1])
         
-        # Calculate and update all metrics
-        self.calculate_snr_mse()
+        # Calculate and update all metrics once the burst of changes settles
+        self._metrics_timer.start()
+    
+    
+    def closeEvent(self, event):
+        """Stop the metrics worker thread before the window goes away"""
+        self.metrics_thread.quit()
+        self.metrics_thread.wait()
+        super().closeEvent(event)
 
 
 # === MAIN APPLICATION ===
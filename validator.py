@@ -7,11 +7,12 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QWidget,
                             QPushButton, QHBoxLayout, QLabel, QComboBox, 
                             QCheckBox, QSlider, QSpinBox, QGridLayout, QGroupBox,
                             QDoubleSpinBox, QFileDialog, QMessageBox, QRadioButton,
-                            QButtonGroup, QSplitter)
-from PyQt5.QtCore import QTimer, Qt, pyqtSignal
+                            QButtonGroup, QSplitter, QGraphicsItem)
+from PyQt5.QtCore import QTimer, Qt, pyqtSignal, QSignalBlocker
 from PyQt5.QtGui import QFont
 import os
 import struct
+from math import gcd
 from scipy import signal as scipy_signal
 from scipy.interpolate import interp1d
 from scipy.fft import fft, fftfreq
@@ -38,9 +39,10 @@ class ECGSignalValidator(QMainWindow):
         
         # Data storage
         self.reference_data = None  # 12-channel reference from binary
-        self.measured_data = {}     # Dictionary of measured signals by channel
+        self.measured_data = None   # (12, N) measured signals, rows zero-padded to the longest
         self.time_reference = None
-        self.time_measured = {}
+        self.time_measured = None   # Time axis shared by all measured channels
+        self._meas_len = np.zeros(12, dtype=int)  # Valid samples per measured channel
         
         # Display mode
         self.display_mode = "side_by_side"  # or "overlay"
@@ -49,6 +51,22 @@ class ECGSignalValidator(QMainWindow):
         self.window_size = 2000
         self.current_index = 0
         self.time_offset = 0.0
+        self.align_decimation = 10  # Decimation factor for auto-align correlation on long signals
+        self.align_coarse_min_samples = 1 << 20  # Below this a full-resolution FFT correlation is cheap
+        self.align_candidates = 8  # Coarse correlation peaks refined at full resolution
+        self.align_min_beat_interval = 0.3  # Seconds; coarse peaks closer than this are one beat
+        self._metrics_key = None  # (channel, time offset, scale, v offset) of last metrics
+        self._vis_buf = np.empty(0, dtype=np.float32)  # Adjusted measured samples of the visible window
+        self._yrange_keys = {}  # Plot widget -> view key of its last Y autorange
+        self._loading = False  # Reentrancy guard for load_all_data
+        
+        # Throttle timers - bursts of widget events collapse into one redraw / metrics pass
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.timeout.connect(self._do_update_plots)
+        self._metrics_timer = QTimer(self)
+        self._metrics_timer.setSingleShot(True)
+        self._metrics_timer.timeout.connect(self._do_calculate_snr_mse)
         
         # Signal folder
         self.signal_folder = "signal"
@@ -278,16 +296,16 @@ class ECGSignalValidator(QMainWindow):
         self.ref_plot_widget.setLabel('left', 'Voltage (mV)')
         self.ref_plot_widget.setLabel('bottom', 'Time (s)')
         
-        self.ref_plot_line = self.ref_plot_widget.plot(pen=pg.mkPen(color='b', width=2))
+        self.ref_plot_line = self.create_plot_line(self.ref_plot_widget, 'b')
         
         # Measured plot (right)
         self.measured_plot_widget = pg.PlotWidget(title="Measured Signal (from Oscilloscope)")
         self.measured_plot_widget.setBackground('w')
         self.measured_plot_widget.showGrid(x=True, y=True, alpha=0.3)
-        self.measured_plot_widget.setLabel('left', 'Voltage (V)')
+        self.measured_plot_widget.setLabel('left', 'Voltage (mV)')
         self.measured_plot_widget.setLabel('bottom', 'Time (s)')
         
-        self.measured_plot_line = self.measured_plot_widget.plot(pen=pg.mkPen(color='r', width=2))
+        self.measured_plot_line = self.create_plot_line(self.measured_plot_widget, 'r')
         
         # Link X axes
         self.measured_plot_widget.setXLink(self.ref_plot_widget)
@@ -310,22 +328,27 @@ class ECGSignalValidator(QMainWindow):
         self.overlay_plot.setLabel('bottom', 'Time (s)')
         
         # Create two lines
-        self.overlay_ref_line = self.overlay_plot.plot(
-            pen=pg.mkPen(color='b', width=2), 
-            name='Reference'
-        )
-        self.overlay_measured_line = self.overlay_plot.plot(
-            pen=pg.mkPen(color='r', width=2), 
-            name='Measured'
-        )
+        self.overlay_ref_line = self.create_plot_line(self.overlay_plot, 'b', name='Reference')
+        self.overlay_measured_line = self.create_plot_line(self.overlay_plot, 'r', name='Measured')
         
         # Add legend
         self.overlay_plot.addLegend()
         
         self.plot_layout.addWidget(self.overlay_plot)
     
+    def create_plot_line(self, plot_widget, color, name=None):
+        """Create a curve with a cosmetic pen, rasterized once into a device pixel cache"""
+        line = plot_widget.plot(pen=pg.mkPen(color=color, width=2, cosmetic=True), name=name)
+        line.curve.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
+        return line
+    
     def load_all_data(self):
         """Load reference binary and all CSV files"""
+        # Programmatic widget updates below must not re-enter a reload
+        if self._loading:
+            return
+        self._loading = True
+        
         try:
             # Check if signal folder exists
             if not os.path.exists(self.signal_folder):
@@ -345,18 +368,26 @@ class ECGSignalValidator(QMainWindow):
             
             # Debug info
             if self.reference_data is not None:
+                # One pass over all channels instead of a mask per channel
+                non_zero = self.reference_data != 0
+                counts = non_zero.sum(axis=1)
+                mins = np.where(non_zero, self.reference_data, np.inf).min(axis=1)
+                maxs = np.where(non_zero, self.reference_data, -np.inf).max(axis=1)
+                num_samples = self.reference_data.shape[1]
+                
                 print("\nReference data loaded:")
                 for i in range(12):
-                    channel_data = self.reference_data[i]
-                    non_zero = channel_data[channel_data != 0]
-                    if len(non_zero) > 0:
-                        print(f"Channel {self.channel_names[i]}: min={np.min(non_zero):.2f} mV, max={np.max(non_zero):.2f} mV, samples={len(channel_data)}")
+                    if counts[i] > 0:
+                        print(f"Channel {self.channel_names[i]}: min={mins[i]:.2f} mV, max={maxs[i]:.2f} mV, samples={num_samples}")
                     else:
                         print(f"Channel {self.channel_names[i]}: Empty (all zeros)")
             
-            # Load all CSV files
-            self.measured_data = {}
-            self.time_measured = {}
+            # Load all CSV files into one (12, N) array, missing channels stay zero
+            num_samples = int(len(self.time_reference) * self.measured_sample_rate / self.reference_sample_rate)
+            self.measured_data = np.zeros((12, num_samples), dtype=np.float32)
+            self._meas_len = np.zeros(12, dtype=int)
+            self._metrics_key = None
+            self._yrange_keys = {}
             
             for i in range(12):
                 csv_filename = f"{i+1}.csv"
@@ -366,22 +397,36 @@ class ECGSignalValidator(QMainWindow):
                     self.load_measured_csv(csv_path, i)
                     self.status_label.setText(f"Loaded channel {i+1}")
                 else:
-                    # Create mock data (zero signal)
-                    num_samples = int(len(self.time_reference) * self.measured_sample_rate / self.reference_sample_rate)
-                    self.time_measured[i] = np.linspace(0, self.time_reference[-1], num_samples)
-                    self.measured_data[i] = np.zeros(num_samples)
+                    # Mock data (zero signal) is the untouched row
+                    self._meas_len[i] = num_samples
                     print(f"Channel {i+1}: Using mock data (file not found)")
             
+            # One time axis based on measured sample rate serves every channel
+            self.time_measured = np.arange(self.measured_data.shape[1]) / self.measured_sample_rate
+            
             # Update navigation slider
-            if self.reference_data is not None:
-                max_samples = len(self.reference_data[0])
-                self.nav_slider.setMaximum(max(0, max_samples - self.window_size))
+            self.update_nav_range()
             
             self.status_label.setText("All data loaded successfully")
             self.update_plots()
             
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load data: {str(e)}")
+        finally:
+            self._loading = False
+    
+    def update_nav_range(self):
+        """Resize the navigation slider without a cascading navigate_signal"""
+        if self.reference_data is None:
+            return
+        
+        max_samples = len(self.reference_data[0])
+        blocker = QSignalBlocker(self.nav_slider)
+        self.nav_slider.setMaximum(max(0, max_samples - self.window_size))
+        blocker.unblock()
+        
+        # Pick up any clamp of the slider value silently
+        self.current_index = self.nav_slider.value()
     
     def load_reference_binary(self, filepath):
         """Load binary reference file"""
@@ -393,8 +438,8 @@ class ECGSignalValidator(QMainWindow):
             with open(filepath, 'rb') as f:
                 raw_data = f.read()
             
-            # Initialize array for 12 channels
-            self.reference_data = np.zeros((12, num_samples))
+            # Initialize array for 12 channels (float32 is ample for 12-bit ADC data in mV)
+            self.reference_data = np.zeros((12, num_samples), dtype=np.float32)
             
             # Parse data - file format is sequential: Ch1_S1, Ch2_S1, ..., Ch12_S1, Ch1_S2, ...
             idx = 0
@@ -405,12 +450,11 @@ class ECGSignalValidator(QMainWindow):
                     self.reference_data[channel, sample] = value
                     idx += 2
             
-            # Create time array
+            # Create time array (float64: overlap masks compare it against the float64 measured axis)
             self.time_reference = np.arange(num_samples) / self.reference_sample_rate
             
-            # Convert ADC to mV for display
-            for i in range(12):
-                self.reference_data[i] = self.adc_to_mv(self.reference_data[i])
+            # Convert ADC to mV for display (elementwise, so all channels at once)
+            self.reference_data = self.adc_to_mv(self.reference_data)
             
             print(f"Loaded binary file: {num_samples} samples, {12} channels")
             print(f"ADC range: {np.min(self.reference_data):.2f} - {np.max(self.reference_data):.2f} (before conversion)")
@@ -435,17 +479,25 @@ class ECGSignalValidator(QMainWindow):
                 else:
                     raise Exception("No voltage column found in CSV")
             
-            # Create time array based on measured sample rate
+            # Grow all rows to the longest capture (zero padded)
             num_samples = len(voltage)
-            duration = num_samples / self.measured_sample_rate
-            time = np.linspace(0, duration, num_samples)
+            if num_samples > self.measured_data.shape[1]:
+                grown = np.zeros((12, num_samples), dtype=np.float32)
+                grown[:, :self.measured_data.shape[1]] = self.measured_data
+                self.measured_data = grown
             
-            self.measured_data[channel_idx] = voltage
-            self.time_measured[channel_idx] = time
+            # Stored in mV (oscilloscope reports V) so plots and metrics share one unit
+            self.measured_data[channel_idx, :num_samples] = voltage * 1000.0
+            self._meas_len[channel_idx] = num_samples
             
         except Exception as e:
             raise Exception(f"Error loading CSV file: {str(e)}")
     
+    def get_measured_signal(self, channel):
+        """Return (time, signal) views of one measured channel trimmed to its length"""
+        n = self._meas_len[channel]
+        return self.time_measured[:n], self.measured_data[channel, :n]
+    
     def adc_to_mv(self, adc_values):
         """Convert ADC values to mV - reverse of converter process"""
         # ADC values are in range 0-4095 (12-bit)
@@ -468,6 +520,18 @@ class ECGSignalValidator(QMainWindow):
     
     # === NEW METRIC CALCULATION FUNCTIONS ===
     
+    def calculate_mse_and_power(self, ref_signal, measured_signal):
+        """Calculate MSE and mean reference power in float32 without squared temporaries"""
+        ref = np.asarray(ref_signal, dtype=np.float32)
+        noise = ref - np.asarray(measured_signal, dtype=np.float32)
+        n = len(ref)
+        
+        # Dot products reduce in one pass each
+        mse = np.dot(noise, noise) / n
+        signal_power = np.dot(ref, ref) / n
+        
+        return mse, signal_power
+    
     def calculate_peak_error(self, ref_signal, measured_signal):
         """Calculate peak error between reference and measured signals"""
         try:
@@ -626,8 +690,13 @@ class ECGSignalValidator(QMainWindow):
         self.load_all_data()
     
     def calculate_snr_mse(self):
+        """Schedule a metrics update (throttled to one pass per 100 ms)"""
+        if not self._metrics_timer.isActive():
+            self._metrics_timer.start(100)
+    
+    def _do_calculate_snr_mse(self):
         """Calculate SNR, MSE and all additional metrics"""
-        if self.reference_data is None or self.current_channel not in self.measured_data:
+        if self.reference_data is None or self.measured_data is None:
             self.snr_label.setText("SNR: -- dB")
             self.mse_label.setText("MSE: --")
             self.peak_error_label.setText("Peak Error: -- mV")
@@ -635,22 +704,27 @@ class ECGSignalValidator(QMainWindow):
             self.correlation_label.setText("Correlation: --")
             return
         
+        # Apply scale and offset to measured signal
+        scale = self.scale_spinbox.value()
+        v_offset = self.signal_offset_spinbox.value()
+        
+        # Metrics cover the whole overlap, so navigation alone never changes them
+        metrics_key = (self.current_channel, self.time_offset, scale, v_offset)
+        if metrics_key == self._metrics_key:
+            return
+        self._metrics_key = metrics_key
+        
         try:
             # Get reference signal
             ref_signal = self.reference_data[self.current_channel]
             ref_time = self.time_reference
             
             # Get measured signal with adjustments
-            measured_signal = self.measured_data[self.current_channel]
-            measured_time = self.time_measured[self.current_channel] + self.time_offset
-            
-            # Apply scale and offset to measured signal
-            scale = self.scale_spinbox.value()
-            v_offset = self.signal_offset_spinbox.value()
-            measured_adjusted = measured_signal * scale + v_offset
+            measured_time, measured_signal = self.get_measured_signal(self.current_channel)
+            measured_time = measured_time + self.time_offset
             
-            # Convert measured signal from V to mV for consistent units
-            measured_adjusted_mv = measured_adjusted * 1000
+            # Measured signal is stored in mV, the V offset is converted to match
+            measured_adjusted_mv = measured_signal * scale + v_offset * 1000
             
             # Find overlapping time range
             time_start = max(ref_time[0], measured_time[0])
@@ -687,16 +761,11 @@ class ECGSignalValidator(QMainWindow):
             measured_resampled = measured_resampled[:min_len]
             
             # === EXISTING CALCULATIONS: MSE and SNR ===
-            # Calculate MSE
-            mse = np.mean((ref_overlap - measured_resampled) ** 2)
-            
-            # Calculate SNR
-            signal_rms = np.sqrt(np.mean(ref_overlap ** 2))
-            noise = ref_overlap - measured_resampled
-            noise_rms = np.sqrt(np.mean(noise ** 2))
+            # MSE is the noise power, so SNR = 10*log10(signal power / MSE)
+            mse, signal_power = self.calculate_mse_and_power(ref_overlap, measured_resampled)
             
-            if noise_rms > 0:
-                snr_db = 20 * np.log10(signal_rms / noise_rms)
+            if mse > 0:
+                snr_db = 10 * np.log10(signal_power / mse)
             else:
                 snr_db = float('inf')
             
@@ -732,6 +801,7 @@ class ECGSignalValidator(QMainWindow):
             )
             
         except Exception as e:
+            self._metrics_key = None
             # Reset all displays on error
             self.snr_label.setText("SNR: Error")
             self.mse_label.setText("MSE: Error")
@@ -751,9 +821,7 @@ class ECGSignalValidator(QMainWindow):
         """Change display window size"""
         self.window_size = value
         # Update navigation slider
-        if self.reference_data is not None:
-            max_samples = len(self.reference_data[0])
-            self.nav_slider.setMaximum(max(0, max_samples - self.window_size))
+        self.update_nav_range()
         self.update_plots()
     
     def navigate_signal(self, value):
@@ -763,30 +831,76 @@ class ECGSignalValidator(QMainWindow):
     
     def auto_align_signals(self):
         """Automatically align signals using cross-correlation"""
-        if self.reference_data is None or self.current_channel not in self.measured_data:
+        if self.reference_data is None or self.measured_data is None:
             return
         
         try:
             # Get current channel data
             ref_signal = self.reference_data[self.current_channel]
-            measured_signal = self.measured_data[self.current_channel]
-            
-            # Resample measured signal to match reference sample rate
-            if len(measured_signal) != len(ref_signal):
-                f = interp1d(self.time_measured[self.current_channel], 
-                           measured_signal, kind='linear', 
-                           bounds_error=False, fill_value=0)
-                measured_resampled = f(self.time_reference)
+            _, measured_signal = self.get_measured_signal(self.current_channel)
+            
+            # Resample measured signal to match reference sample rate (polyphase, anti-aliased)
+            if self.measured_sample_rate != self.reference_sample_rate:
+                g = gcd(self.reference_sample_rate, self.measured_sample_rate)
+                up = self.reference_sample_rate // g
+                down = self.measured_sample_rate // g
+                measured_resampled = scipy_signal.resample_poly(measured_signal, up, down)
             else:
                 measured_resampled = measured_signal
             
-            # Normalize signals for correlation
-            ref_norm = (ref_signal - np.mean(ref_signal)) / np.std(ref_signal)
-            measured_norm = (measured_resampled - np.mean(measured_resampled)) / np.std(measured_resampled)
-            
-            # Cross-correlation
-            correlation = scipy_signal.correlate(measured_norm, ref_norm, mode='same')
-            lag = np.argmax(correlation) - len(correlation) // 2
+            # Match reference length (zero-fill past the end of the capture)
+            if len(measured_resampled) >= len(ref_signal):
+                measured_resampled = measured_resampled[:len(ref_signal)]
+            else:
+                measured_resampled = np.pad(measured_resampled, (0, len(ref_signal) - len(measured_resampled)))
+            
+            # Normalize signals for correlation (single precision is plenty for lag search)
+            ref_norm = ((ref_signal - np.mean(ref_signal)) / np.std(ref_signal)).astype(np.float32)
+            measured_norm = ((measured_resampled - np.mean(measured_resampled)) / np.std(measured_resampled)).astype(np.float32)
+            
+            n = len(ref_norm)
+            q = self.align_decimation
+            if q > 1 and n > self.align_coarse_min_samples:
+                # Very long signals: coarse search on decimated copies (QRS energy is mostly
+                # filtered out, so the best coarse peak can be wrong - keep the top few beats)
+                ref_coarse = scipy_signal.decimate(ref_norm, q, ftype='fir').astype(np.float32)
+                measured_coarse = scipy_signal.decimate(measured_norm, q, ftype='fir').astype(np.float32)
+                coarse = scipy_signal.correlate(measured_coarse, ref_coarse, mode='same', method='fft')
+                
+                # Highest local maxima at least one beat apart, so each candidate is a different beat
+                # rather than a neighbouring sample of the same peak; the global maximum always stays
+                beat = max(1, int(self.align_min_beat_interval * self.reference_sample_rate / q))
+                peaks = scipy_signal.find_peaks(coarse, distance=beat)[0]
+                
+                # Rank by parabola-interpolated height - on the coarse grid a peak between two
+                # samples looks lower than an on-grid one from another beat
+                y0, y1, y2 = coarse[peaks - 1], coarse[peaks], coarse[peaks + 1]
+                denom = y0 - 2 * y1 + y2
+                delta = np.divide(0.5 * (y0 - y2), denom, out=np.zeros_like(denom), where=denom != 0)
+                height = y1 - 0.25 * (y0 - y2) * delta
+                top = peaks[np.argsort(height)[-self.align_candidates:]]
+                top = np.union1d(top, [np.argmax(coarse)])
+                
+                # Refine each candidate at full resolution over +-2q samples (within the 'same' window)
+                centres = (top - len(coarse) // 2) * q
+                lags = np.unique(np.concatenate([np.arange(c - 2 * q, c + 2 * q + 1) for c in centres]))
+                lags = lags[(lags >= -(n // 2)) & (lags < n - n // 2)]
+                fine = np.array([np.dot(measured_norm[max(0, l):n + min(0, l)],
+                                        ref_norm[max(0, -l):n - max(0, l)]) for l in lags])
+            else:
+                # Full-resolution cross-correlation - force the FFT path, the direct path is O(N^2)
+                fine = scipy_signal.correlate(measured_norm, ref_norm, mode='same', method='fft')
+                lags = np.arange(len(fine)) - len(fine) // 2
+            k = int(np.argmax(fine))
+            
+            # Parabolic fit around the peak recovers sub-sample lag (needs both neighbouring lags)
+            delta = 0.0
+            if 0 < k < len(fine) - 1 and lags[k + 1] - lags[k - 1] == 2:
+                y0, y1, y2 = fine[k-1:k+2]
+                denom = y0 - 2 * y1 + y2
+                if denom != 0:
+                    delta = 0.5 * (y0 - y2) / denom
+            lag = lags[k] + delta
             
             # Convert lag to time offset
             time_offset = lag / self.reference_sample_rate
@@ -799,7 +913,25 @@ class ECGSignalValidator(QMainWindow):
         except Exception as e:
             QMessageBox.warning(self, "Warning", f"Auto-align failed: {str(e)}")
     
+    def update_y_range(self, plot_widget, key, *arrays):
+        """Auto-range a plot's Y axis, skipping the reductions when its view key is unchanged"""
+        if self._yrange_keys.get(plot_widget) == key:
+            return
+        if any(len(a) == 0 for a in arrays):
+            return
+        
+        y_min = min(a.min() for a in arrays)
+        y_max = max(a.max() for a in arrays)
+        if y_min != 0 or y_max != 0:
+            plot_widget.setYRange(y_min, y_max, padding=0.1)
+        self._yrange_keys[plot_widget] = key
+    
     def update_plots(self):
+        """Schedule a plot update (throttled to one redraw per 16 ms)"""
+        if not self._update_timer.isActive():
+            self._update_timer.start(16)
+    
+    def _do_update_plots(self):
         """Update all plots with current data"""
         if self.reference_data is None:
             return
@@ -815,57 +947,61 @@ class ECGSignalValidator(QMainWindow):
         ref_time_visible = self.time_reference[start_idx:end_idx]
         ref_data_visible = ref_data[start_idx:end_idx]
         
+        # Scale and offset applied to the measured signal
+        scale = self.scale_spinbox.value()
+        v_offset = self.signal_offset_spinbox.value()
+        
         # Measured data
-        if self.current_channel in self.measured_data:
-            measured_data = self.measured_data[self.current_channel]
-            measured_time = self.time_measured[self.current_channel] + self.time_offset
-            
-            # Apply scale and offset to measured signal
-            scale = self.scale_spinbox.value()
-            v_offset = self.signal_offset_spinbox.value()
-            measured_data_adjusted = measured_data * scale + v_offset
-            
-            # Find visible range for measured data
-            time_start = ref_time_visible[0]
-            time_end = ref_time_visible[-1]
-            
-            mask = (measured_time >= time_start) & (measured_time <= time_end)
-            measured_time_visible = measured_time[mask]
-            measured_data_visible = measured_data_adjusted[mask]
+        if self.measured_data is not None:
+            measured_time, measured_data = self.get_measured_signal(self.current_channel)
+            
+            # Find visible range for measured data (time axis is sorted, so slice instead of mask)
+            time_start = ref_time_visible[0] - self.time_offset
+            time_end = ref_time_visible[-1] - self.time_offset
+            lo = np.searchsorted(measured_time, time_start, 'left')
+            hi = np.searchsorted(measured_time, time_end, 'right')
+            measured_time_visible = measured_time[lo:hi] + self.time_offset
+            
+            # Apply scale and offset to the visible part only, into a reused buffer
+            if len(self._vis_buf) < hi - lo:
+                self._vis_buf = np.empty(hi - lo, dtype=np.float32)
+            measured_data_visible = self._vis_buf[:hi - lo]
+            np.multiply(measured_data[lo:hi], scale, out=measured_data_visible)
+            measured_data_visible += v_offset * 1000
         else:
             measured_time_visible = ref_time_visible
             measured_data_visible = np.zeros_like(ref_data_visible)
         
+        # Y autorange only has to be redone when the visible data changes
+        view_key = (self.current_channel, start_idx, end_idx)
+        
         # Update plots based on display mode
         if self.display_mode == "side_by_side":
             # Update reference plot
-            self.ref_plot_line.setData(ref_time_visible, ref_data_visible)
+            self.ref_plot_line.setData(ref_time_visible, ref_data_visible, connect='all', skipFiniteCheck=True)
             self.ref_plot_widget.setTitle(f"Reference Signal - Channel {self.channel_names[self.current_channel]}")
             
             # Update measured plot
-            self.measured_plot_line.setData(measured_time_visible, measured_data_visible)
+            self.measured_plot_line.setData(measured_time_visible, measured_data_visible, connect='all', skipFiniteCheck=True)
             self.measured_plot_widget.setTitle(f"Measured Signal - Channel {self.channel_names[self.current_channel]} (Scale: {scale:.1f}x, Offset: {v_offset:.3f}V)")
             
             # Auto-range Y axis
-            if len(ref_data_visible) > 0:
-                self.ref_plot_widget.setYRange(ref_data_visible.min(), ref_data_visible.max(), padding=0.1)
-            if len(measured_data_visible) > 0 and np.any(measured_data_visible != 0):
-                self.measured_plot_widget.setYRange(measured_data_visible.min(), measured_data_visible.max(), padding=0.1)
+            self.update_y_range(self.ref_plot_widget, view_key, ref_data_visible)
+            self.update_y_range(self.measured_plot_widget, view_key + (self.time_offset, scale, v_offset),
+                                measured_data_visible)
             
         else:  # overlay mode
-            # Convert measured signal to mV for comparison (assuming it's in volts)
-            measured_mv = measured_data_visible * 1000 if len(measured_data_visible) > 0 else np.zeros_like(ref_data_visible)
+            # Measured signal is already in mV
+            measured_mv = measured_data_visible
             
             # Update overlay plot
-            self.overlay_ref_line.setData(ref_time_visible, ref_data_visible)
-            self.overlay_measured_line.setData(measured_time_visible, measured_mv)
+            self.overlay_ref_line.setData(ref_time_visible, ref_data_visible, connect='all', skipFiniteCheck=True)
+            self.overlay_measured_line.setData(measured_time_visible, measured_mv, connect='all', skipFiniteCheck=True)
             self.overlay_plot.setTitle(f"Signal Comparison - Channel {self.channel_names[self.current_channel]} (Scale: {scale:.1f}x, Offset: {v_offset:.3f}V)")
             
             # Auto-range
-            if len(ref_data_visible) > 0 and len(measured_mv) > 0:
-                all_data = np.concatenate([ref_data_visible, measured_mv])
-                if np.any(all_data != 0):
-                    self.overlay_plot.setYRange(all_data.min(), all_data.max(), padding=0.1)
+            self.update_y_range(self.overlay_plot, view_key + (self.time_offset, scale, v_offset),
+                                ref_data_visible, measured_mv)
         
         # Update X range
         if len(ref_time_visible) > 0: